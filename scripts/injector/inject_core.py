@@ -0,0 +1,45 @@
+"""
+Shared injection helpers for the inject_* scripts.
+
+Every injector used to carry its own copy of the word-boundary finder and
+inject_n; they live here once so the scripts stay in sync and a fix lands
+everywhere at the same time.
+"""
+
+import re
+
+# A valid insertion point is the end of any whitespace run with non-space on
+# both sides; the C regex engine scans for that far faster than a
+# per-character Python loop.
+_BOUNDARY_RE = re.compile(r"(?<=\S)\s+(?=\S)")
+
+def find_between_word_positions(text: str):
+    """
+    Return insertion indices such that inserting at that index places content
+    BETWEEN words (never slicing a token). Works on whitespace runs.
+    """
+    return [m.end() for m in _BOUNDARY_RE.finditer(text)]
+
+def inject_n(text: str, snippet: str, n: int, prob: float, rng) -> str:
+    """Inject up to n times with probability prob per attempt, in one string build."""
+    spots = find_between_word_positions(text)
+    if not spots:
+        return text
+    # Pick every insertion point up front, then assemble the result with one
+    # join; no rescanning of the grown text or quadratic slice-copies. The
+    # attempts that pass the probability gate are drawn in a single batched
+    # rng.choices call rather than one choice() per attempt.
+    attempts = max(0, n)
+    kept = attempts if prob >= 1.0 else sum(rng.random() <= prob for _ in range(attempts))
+    if not kept:
+        return text
+    picks = sorted(rng.choices(spots, k=kept))
+    parts, last = [], 0
+    for idx in picks:
+        parts.append(text[last:idx])
+        parts.append(snippet)
+        # trailing space so the next token isn't glued to snippet
+        parts.append(" ")
+        last = idx
+    parts.append(text[last:])
+    return "".join(parts)
@@ -3,6 +3,8 @@ import random
 from pathlib import Path
 import boto3
 
+from inject_core import inject_n
+
 # ==============================
 # Config (edit as needed)
 # ==============================
@@ -15,48 +17,14 @@ OUTPUT_FILE = Path("outputs/trec_dl/combined_result_translated_gibberish_20.csv"
 
 rng = random.Random(SEED)
 
-def find_between_word_positions(text: str):
-    """
-    Return insertion indices such that inserting at that index places content
-    BETWEEN words (never slicing a token). Works on whitespace runs.
-    """
-    positions = []
-    i, n = 0, len(text)
-    while i < n:
-        if text[i].isspace():
-            j = i
-            while j < n and text[j].isspace():
-                j += 1
-            # whitespace run is [i, j); insert before next non-space if surrounded by non-spaces
-            if i > 0 and j < n and not text[i-1].isspace() and not text[j].isspace():
-                positions.append(j)
-            i = j
-        else:
-            i += 1
-    return positions
-
-def inject_once(text: str, snippet: str) -> str:
-    """Inject `snippet` at a random valid boundary; falls back to original text if none."""
-    spots = find_between_word_positions(text)
-    if not spots:
-        return text
-    idx = rng.choice(spots)
-    # add a trailing space so the next token isn't glued to snippet
-    return text[:idx] + snippet + " " + text[idx:]
-
-def inject_n(text: str, snippet: str, n: int, prob: float) -> str:
-    """Inject up to n times with probability prob per attempt, rescanning boundaries each time."""
-    out = text
-    for _ in range(max(0, n)):
-        if rng.random() <= prob:
-            out = inject_once(out, snippet)
-    return out
-
 with open(INPUT_FILE, newline="", encoding="utf-8") as fin, \
      open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as fout:
 
     reader = csv.DictReader(fin)
     fieldnames = list(reader.fieldnames or [])
+    missing = {"query", "passage"} - set(fieldnames)
+    if missing:
+        raise SystemExit(f"{INPUT_FILE}: missing required column(s): {sorted(missing)}")
 
     # Add our new columns
     colName = "query_gibberish"
@@ -65,8 +33,10 @@ with open(INPUT_FILE, newline="", encoding="utf-8") as fin, \
     if "passage_injected" not in fieldnames:
         fieldnames.append("passage_injected")
 
-    writer = csv.DictWriter(fout, fieldnames=fieldnames)
-    writer.writeheader()
+    # Plain csv.writer with a fixed column order; avoids DictWriter's
+    # per-row fieldname mapping.
+    writer = csv.writer(fout)
+    writer.writerow(fieldnames)
 
     for row in reader:
         # 1) Translate the QUERY (not the passage)
@@ -75,12 +45,12 @@ with open(INPUT_FILE, newline="", encoding="utf-8") as fin, \
         query_gibberish = gibberish
 
         # 2) Inject translated query into random positions in the passage
-        passage = row.get("passage", "")
-        passage_injected = inject_n(passage, query_gibberish, INJECT_COUNT, INJECT_PROB)
+        passage = row["passage"]
+        passage_injected = inject_n(passage, query_gibberish, INJECT_COUNT, INJECT_PROB, rng)
 
         # 3) Write results
         row[colName] = query_gibberish
         row["passage_injected"] = passage_injected
-        writer.writerow(row)
+        writer.writerow([row.get(k, "") for k in fieldnames])
 
 print(f"Done. Output saved to: {OUTPUT_FILE}")
@@ -1,7 +1,13 @@
 import csv
 import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+
 import boto3
+from botocore.config import Config
+
+from inject_core import inject_n
 
 # ==============================
 # Config (edit as needed)
@@ -13,55 +19,35 @@ INJECT_COUNT = 1            # how many times to inject the translated query
 INJECT_PROB = 1.0           # probability per injection attempt (0..1)
 INPUT_FILE = Path("outputs/trec_dl/combined_irrelevant_results_20.csv")
 OUTPUT_FILE = Path("outputs/trec_dl/combined_result_translated_"+ TARGET_LANG +"_20.csv")
+MAX_WORKERS = 16            # concurrent Translate calls
 # ==============================
 
-# AWS Translate client
-translate = boto3.client("translate", region_name=REGION)
-
-rng = random.Random(SEED)
+# AWS Translate client; pool sized so the worker threads never queue on sockets
+translate = boto3.client(
+    "translate",
+    region_name=REGION,
+    config=Config(max_pool_connections=MAX_WORKERS * 2),
+)
 
-def find_between_word_positions(text: str):
-    """
-    Return insertion indices such that inserting at that index places content
-    BETWEEN words (never slicing a token). Works on whitespace runs.
-    """
-    positions = []
-    i, n = 0, len(text)
-    while i < n:
-        if text[i].isspace():
-            j = i
-            while j < n and text[j].isspace():
-                j += 1
-            # whitespace run is [i, j); insert before next non-space if surrounded by non-spaces
-            if i > 0 and j < n and not text[i-1].isspace() and not text[j].isspace():
-                positions.append(j)
-            i = j
-        else:
-            i += 1
-    return positions
+@lru_cache(maxsize=None)
+def translate_query(q: str) -> str:
+    resp = translate.translate_text(
+        Text=q,
+        SourceLanguageCode="auto",
+        TargetLanguageCode=TARGET_LANG
+    )
+    return resp["TranslatedText"]
 
-def inject_once(text: str, snippet: str) -> str:
-    """Inject `snippet` at a random valid boundary; falls back to original text if none."""
-    spots = find_between_word_positions(text)
-    if not spots:
-        return text
-    idx = rng.choice(spots)
-    # add a trailing space so the next token isn't glued to snippet
-    return text[:idx] + snippet + " " + text[idx:]
-
-def inject_n(text: str, snippet: str, n: int, prob: float) -> str:
-    """Inject up to n times with probability prob per attempt, rescanning boundaries each time."""
-    out = text
-    for _ in range(max(0, n)):
-        if rng.random() <= prob:
-            out = inject_once(out, snippet)
-    return out
+rng = random.Random(SEED)
 
 with open(INPUT_FILE, newline="", encoding="utf-8") as fin, \
      open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as fout:
 
     reader = csv.DictReader(fin)
     fieldnames = list(reader.fieldnames or [])
+    missing = {"query", "passage"} - set(fieldnames)
+    if missing:
+        raise SystemExit(f"{INPUT_FILE}: missing required column(s): {sorted(missing)}")
 
     # Add our new columns
     colName = "query_" + TARGET_LANG
@@ -70,25 +56,30 @@ with open(INPUT_FILE, newline="", encoding="utf-8") as fin, \
     if "passage_injected" not in fieldnames:
         fieldnames.append("passage_injected")
 
-    writer = csv.DictWriter(fout, fieldnames=fieldnames)
-    writer.writeheader()
+    # Plain csv.writer with a fixed column order; avoids DictWriter's
+    # per-row fieldname mapping.
+    writer = csv.writer(fout)
+    writer.writerow(fieldnames)
+
+    rows = list(reader)
 
-    for row in reader:
-        # 1) Translate the QUERY (not the passage)
-        resp = translate.translate_text(
-            Text=row["query"],
-            SourceLanguageCode="auto",
-            TargetLanguageCode=TARGET_LANG
-        )
-        query_translated = resp["TranslatedText"]
+    # 1) Translate each UNIQUE query once (TREC-DL repeats the same query
+    #    across its passages), overlapping the network calls across threads;
+    #    the per-row lookups below are then lru_cache hits.
+    unique_queries = list(dict.fromkeys(row["query"] for row in rows))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for _ in ex.map(translate_query, unique_queries):
+            pass
 
+    for row in rows:
+        query_translated = translate_query(row["query"])
         # 2) Inject translated query into random positions in the passage
-        passage = row.get("passage", "")
-        passage_injected = inject_n(passage, query_translated, INJECT_COUNT, INJECT_PROB)
+        passage = row["passage"]
+        passage_injected = inject_n(passage, query_translated, INJECT_COUNT, INJECT_PROB, rng)
 
         # 3) Write results
         row[colName] = query_translated
         row["passage_injected"] = passage_injected
-        writer.writerow(row)
+        writer.writerow([row.get(k, "") for k in fieldnames])
 
 print(f"Done. Output saved to: {OUTPUT_FILE}")
@@ -28,6 +28,13 @@ DRY_RUN = False
 
 O_REGEX = re.compile(r'"O"\s*:\s*([0-3])')
 
+# ijson streams large Bedrock logs entry-by-entry instead of materializing
+# the whole array; fall back to whole-file json.loads when it's missing.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 def _candidate_text_blocks(item: dict) -> Iterable[str]:
     """Yield any text fields that might contain the JSON (or JSON-ish) with M/T/O."""
     txt = item.get("response_text")
@@ -51,35 +58,34 @@ def _try_parse_json_for_O(text: str) -> Optional[int]:
       - a JSON object string:   {"M":3,"T":3,"O":3}
       - a stringified JSON:     "[{\"M\":3,\"T\":3,\"O\":3}]"
     Returns int or None.
+
+    An object_hook grabs O while the decoder builds each object, so the
+    parsed tree never needs a second walk.
     """
-    def load_any(s: str):
-        try:
-            return json.loads(s)
-        except Exception:
-            return None
+    found: List[object] = []
 
-    # 1) direct load
-    obj = load_any(text)
-    # 2) if it's still a string that looks like JSON, try once more
-    if isinstance(obj, str):
-        obj2 = load_any(obj)
-        if obj2 is not None:
-            obj = obj2
-
-    # Now inspect
-    if isinstance(obj, list) and obj:
-        first = obj[0]
-        if isinstance(first, dict) and "O" in first:
-            try:
-                return int(first["O"])
-            except Exception:
-                return None
-    if isinstance(obj, dict) and "O" in obj:
+    def hook(d: dict) -> dict:
+        if not found and "O" in d:
+            found.append(d["O"])
+        return d
+
+    try:
+        obj = json.loads(text, object_hook=hook)
+    except Exception:
+        return None
+    # stringified JSON: the payload decoded to a string, parse it once more
+    if not found and isinstance(obj, str):
         try:
-            return int(obj["O"])
+            json.loads(obj, object_hook=hook)
         except Exception:
             return None
-    return None
+
+    if not found:
+        return None
+    try:
+        return int(found[0])
+    except Exception:
+        return None
 
 def _regex_O(text: str) -> Optional[int]:
     m = O_REGEX.search(text)
@@ -107,6 +113,34 @@ def _extract_docid(item: dict) -> Optional[str]:
     d = item.get("docid")
     return str(d).strip() if d is not None else None
 
+def _iter_log_items(f: Path):
+    """Yield log entries one at a time, streaming via ijson when available."""
+    if ijson is not None:
+        with f.open("rb") as fh:
+            first = fh.read(64).lstrip()[:1]
+            fh.seek(0)
+            if first == b"[":
+                yield from ijson.items(fh, "item")
+                return
+            if first == b"{":
+                wrapped = False
+                for item in ijson.items(fh, "records.item"):
+                    wrapped = True
+                    yield item
+                if wrapped:
+                    return
+                # no records wrapper: fall through and load the object whole
+    data = json.loads(f.read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        # common wrapper patterns
+        if "records" in data and isinstance(data["records"], list):
+            data = data["records"]
+        else:
+            data = [data]
+    if not isinstance(data, list):
+        raise ValueError("not a list of entries")
+    yield from data
+
 def read_logs_collect_O_scores(path: Path) -> Dict[str, int]:
     """Read one JSON file or all .json files in a folder. Return docid -> O."""
     files: List[Path]
@@ -118,31 +152,18 @@ def read_logs_collect_O_scores(path: Path) -> Dict[str, int]:
     mapping: Dict[str, int] = {}
     for f in files:
         try:
-            data = json.loads(f.read_text(encoding="utf-8"))
+            for item in _iter_log_items(f):
+                if not isinstance(item, dict):
+                    continue
+                docid = _extract_docid(item)
+                if not docid:
+                    continue
+                o = _extract_O_from_item(item)
+                if o is not None:
+                    mapping[docid] = o
         except Exception as e:
             print(f"[WARN] Skipping {f} (JSON load failed): {e}")
             continue
-
-        # Normalize to list
-        if isinstance(data, dict):
-            # common wrapper patterns
-            if "records" in data and isinstance(data["records"], list):
-                data = data["records"]
-            else:
-                data = [data]
-        if not isinstance(data, list):
-            print(f"[WARN] {f} isn't a list of entries; skipping.")
-            continue
-
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            docid = _extract_docid(item)
-            if not docid:
-                continue
-            o = _extract_O_from_item(item)
-            if o is not None:
-                mapping[docid] = o
     return mapping
 
 def load_csv_rows(csv_path: Path) -> Tuple[List[dict], List[str]]:
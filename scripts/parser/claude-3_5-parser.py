@@ -19,9 +19,10 @@ import json
 import re
 import shutil
 from pathlib import Path
-import csv
 from typing import Dict, Iterable, Tuple, Optional, Any
 
+import pandas as pd
+
 # =========================
 # CONFIG — EDIT THESE
 # =========================
@@ -34,6 +35,13 @@ DRY_RUN = False      # if True, do not write changes; just report what would cha
 
 O_REGEX = re.compile(r'"O"\s*:\s*([0-3])')
 
+# ijson streams large Bedrock logs entry-by-entry instead of materializing
+# the whole array; fall back to whole-file json.loads when it's missing.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 def _get_text_blocks_from_item(item: dict) -> Iterable[str]:
     """Yield any text fields that might contain the JSON with M/T/O."""
     # 1) Top-level 'response_text' if present
@@ -72,6 +80,34 @@ def _extract_docid(item: dict) -> Optional[str]:
         return None
     return str(docid).strip()
 
+def _iter_log_items(f: Path):
+    """Yield log entries one at a time, streaming via ijson when available."""
+    if ijson is not None:
+        with f.open("rb") as fh:
+            first = fh.read(64).lstrip()[:1]
+            fh.seek(0)
+            if first == b"[":
+                yield from ijson.items(fh, "item")
+                return
+            if first == b"{":
+                wrapped = False
+                for item in ijson.items(fh, "records.item"):
+                    wrapped = True
+                    yield item
+                if wrapped:
+                    return
+                # no records wrapper: fall through and load the object whole
+    data = json.loads(f.read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        # common wrapper patterns
+        if "records" in data and isinstance(data["records"], list):
+            data = data["records"]
+        else:
+            data = [data]
+    if not isinstance(data, list):
+        raise ValueError("not a list of entries")
+    yield from data
+
 def read_logs_collect_O_scores(path: Path) -> Dict[str, int]:
     """
     Reads one JSON file (array of objects) or all .json files in a folder.
@@ -87,60 +123,40 @@ def read_logs_collect_O_scores(path: Path) -> Dict[str, int]:
 
     for f in files:
         try:
-            data = json.loads(f.read_text(encoding="utf-8"))
+            for item in _iter_log_items(f):
+                if not isinstance(item, dict):
+                    continue
+                docid = _extract_docid(item)
+                if not docid:
+                    continue
+
+                O_val: Optional[int] = None
+                # Try every candidate text block until we get an O
+                for txt in _get_text_blocks_from_item(item):
+                    O_val = _extract_O_from_text(txt)
+                    if O_val is not None:
+                        break
+
+                if O_val is not None:
+                    mapping[docid] = O_val
         except Exception as e:
             print(f"[WARN] Skipping {f} (JSON load failed): {e}")
             continue
 
-        # Expect a list/array of entries
-        if isinstance(data, dict):
-            # sometimes logs wrap entries in a key; try common cases
-            if "records" in data and isinstance(data["records"], list):
-                data = data["records"]
-            else:
-                # fall back: treat as single entry
-                data = [data]
-
-        if not isinstance(data, list):
-            print(f"[WARN] {f} isn't a list of entries; skipping.")
-            continue
-
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            docid = _extract_docid(item)
-            if not docid:
-                continue
-
-            O_val: Optional[int] = None
-            # Try every candidate text block until we get an O
-            for txt in _get_text_blocks_from_item(item):
-                O_val = _extract_O_from_text(txt)
-                if O_val is not None:
-                    break
-
-            if O_val is not None:
-                mapping[docid] = O_val
-
     return mapping
 
-def load_csv_rows(csv_path: Path) -> Tuple[list, list]:
-    """Returns (rows, fieldnames)."""
-    with csv_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames or []
-        rows = [row for row in reader]
+def load_csv_rows(csv_path: Path) -> Tuple[pd.DataFrame, list]:
+    """Returns (df, fieldnames). Everything stays str so blanks survive."""
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    fieldnames = list(df.columns)
     # enforce required columns exist
     for col in ["docid", "nist_rel", "llm_rel"]:
         if col not in fieldnames:
             raise SystemExit(f"[ERROR] CSV missing required column: {col}")
-    return rows, fieldnames
+    return df, fieldnames
 
-def write_csv_rows(csv_path: Path, rows: list, fieldnames: list) -> None:
-    with csv_path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        w.writerows(rows)
+def write_csv_rows(csv_path: Path, df: pd.DataFrame, fieldnames: list) -> None:
+    df.to_csv(csv_path, index=False, columns=fieldnames)
 
 def main() -> None:
     if not TARGET_CSV.exists():
@@ -151,15 +167,14 @@ def main() -> None:
         print("[WARN] No O scores found in logs — nothing to do.")
         return
 
-    rows, fieldnames = load_csv_rows(TARGET_CSV)
+    df, fieldnames = load_csv_rows(TARGET_CSV)
 
-    updates = 0
-    for row in rows:
-        docid = str(row.get("docid", "")).strip()
-        llm_rel = (row.get("llm_rel") or "").strip()
-        if llm_rel == "" and docid in docid_to_O:
-            row["llm_rel"] = str(docid_to_O[docid])
-            updates += 1
+    # Fill only blank llm_rel cells from the docid -> O map; one vectorized
+    # pass instead of a per-row dict loop.
+    docids = df["docid"].str.strip()
+    mask = (df["llm_rel"].str.strip() == "") & docids.isin(docid_to_O)
+    updates = int(mask.sum())
+    df.loc[mask, "llm_rel"] = docids[mask].map(docid_to_O).astype(int).astype(str)
 
     print(f"[INFO] Rows updated: {updates}")
 
@@ -176,7 +191,7 @@ def main() -> None:
         shutil.copy2(TARGET_CSV, backup)
         print(f"[INFO] Backup written: {backup}")
 
-    write_csv_rows(TARGET_CSV, rows, fieldnames)
+    write_csv_rows(TARGET_CSV, df, fieldnames)
     print(f"[OK] CSV updated: {TARGET_CSV}")
 
 if __name__ == "__main__":
@@ -22,40 +22,60 @@ LOGS_DIR   = Path("outputs/trec_dl/logs")
 OUT_CSV    = Path("outputs/trec_dl_llm_label/relevant/overall_from_logs.csv")
 FILE_GLOB  = "20250918_102202_llm_responses_openai.gpt-oss-20b-1_0_top2.json"
 
-# Passage extraction anchor & guard phrases (regex-friendly, case-insensitive)
-PASSAGE_ANCHOR = r"Consider the following passage:"
-PASSAGE_STOP_BOUNDARY = r"(?:\n\s*(?:Split this problem|For match|For trustworthiness|For overall|Also consider|Strictly produce)|$)"
+# Passage extraction anchor & guard phrases
+PASSAGE_ANCHOR = "Consider the following passage:"
+PASSAGE_STOP_TOKENS = (
+    "Split this problem",
+    "For match",
+    "For trustworthiness",
+    "For overall",
+    "Also consider",
+    "Strictly produce",
+)
 
 # Optional: collapse whitespace in passage to single spaces for CSV friendliness
 COLLAPSE_PASSAGE_WHITESPACE = True
 # =========================
 
-
-# --- Derived / compiled regexes ---
-PASSAGE_RE = re.compile(
-    rf"{PASSAGE_ANCHOR}\s*(?P<p>.*?){PASSAGE_STOP_BOUNDARY}",
-    re.DOTALL | re.IGNORECASE,
-)
-
 # Forgiving regex to pull "O": <digit> from messy generations
 O_REGEX = re.compile(r'"O"\s*:\s*(\d)', re.DOTALL)
 
+# Compiled once; re.sub with a literal pattern pays a cache lookup per call
+_WS_RE = re.compile(r"\s+")
+
+# orjson decodes the multi-MB response logs several times faster than the
+# stdlib parser; fall back silently when it isn't installed.
+try:
+    import orjson
+
+    def _loads(buf):
+        return orjson.loads(buf)
+except ImportError:
+    def _loads(buf):
+        return json.loads(buf)
+
 
 def extract_passage_from_prompt(prompt: str) -> str:
     if not prompt:
         return ""
-    m = PASSAGE_RE.search(prompt)
-    if m:
-        passage = m.group("p").strip()
+    # Plain str.find scans: the old `.*?` + alternation regex could
+    # backtrack badly on long prompts missing the stop phrases.
+    i = prompt.find(PASSAGE_ANCHOR)
+    if i != -1:
+        start = i + len(PASSAGE_ANCHOR)
+        stops = [j for tok in PASSAGE_STOP_TOKENS
+                 if (j := prompt.find(tok, start)) != -1]
+        end = min(stops) if stops else len(prompt)
+        passage = prompt[start:end].strip()
         if COLLAPSE_PASSAGE_WHITESPACE:
-            passage = re.sub(r"\s+", " ", passage)
+            passage = _WS_RE.sub(" ", passage)
         return passage
     # Fallback: take everything after last "passage:" literal
     i = prompt.lower().rfind("passage:")
     if i != -1:
         passage = prompt[i + len("passage:"):].strip()
         if COLLAPSE_PASSAGE_WHITESPACE:
-            passage = re.sub(r"\s+", " ", passage)
+            passage = _WS_RE.sub(" ", passage)
         return passage
     return ""
 
@@ -91,7 +111,14 @@ def extract_overall(text: str) -> Optional[int]:
     if not text:
         return None
 
-    # Strategy 1: direct JSON parse (dict or [dict])
+    # Strategy 1: regex scan. Nearly every response carries a literal
+    # "O": <digit>, and the C regex loop finds it without invoking the
+    # JSON tokenizer; the parse strategies below are correctness fallbacks.
+    m = O_REGEX.search(text)
+    if m:
+        return safe_int(m.group(1))
+
+    # Strategy 2: direct JSON parse (dict or [dict])
     try:
         obj = json.loads(text)
         if isinstance(obj, dict) and "O" in obj:
@@ -103,7 +130,7 @@ def extract_overall(text: str) -> Optional[int]:
     except Exception:
         pass
 
-    # Strategy 2: locate a JSON array segment and parse the first object
+    # Strategy 3: locate a JSON array segment and parse the first object
     try:
         start, end = text.find("["), text.rfind("]")
         if start != -1 and end != -1 and end > start:
@@ -115,11 +142,6 @@ def extract_overall(text: str) -> Optional[int]:
     except Exception:
         pass
 
-    # Strategy 3: regex fallback
-    m = O_REGEX.search(text)
-    if m:
-        return safe_int(m.group(1))
-
     return None
 
 
@@ -138,7 +160,7 @@ def main():
 
         for path in log_files:
             try:
-                items = json.loads(path.read_text(encoding="utf-8"))
+                items = _loads(path.read_bytes())
                 if not isinstance(items, list):
                     print(f"WARN: {path} is not a JSON array; skipping.")
                     continue
@@ -22,14 +22,20 @@ kept = 0
 skipped_missing_label = 0
 skipped_duplicate_docid = 0
 seen_docids = set()
+_seen_add = seen_docids.add
 
 with open(INPUT_FILE, "r", newline="", encoding="utf-8-sig") as fin:
     sample = fin.read(4096)
     fin.seek(0)
-    try:
-        dialect = csv.Sniffer().sniff(sample)
-    except csv.Error:
+    # Files we wrote ourselves start with the canonical header; skip the
+    # Sniffer's statistical pass for those and go straight to excel.
+    if sample.split("\n", 1)[0].strip() == "query,docid,passage,relevance":
         dialect = csv.get_dialect("excel")
+    else:
+        try:
+            dialect = csv.Sniffer().sniff(sample)
+        except csv.Error:
+            dialect = csv.get_dialect("excel")
 
     reader = csv.DictReader(fin, dialect=dialect)
     fieldnames = reader.fieldnames or []
@@ -49,12 +55,15 @@ with open(INPUT_FILE, "r", newline="", encoding="utf-8-sig") as fin:
                 skipped_missing_label += 1
                 continue
 
+            # add() and check the size delta: one hash per docid instead of
+            # a membership test followed by a second hashed insert
             docid = (row.get("docid") or "").strip()
-            if docid in seen_docids:
+            before = len(seen_docids)
+            _seen_add(docid)
+            if len(seen_docids) == before:
                 skipped_duplicate_docid += 1
                 continue
 
-            seen_docids.add(docid)
             writer.writerow(row)
             kept += 1
 
@@ -3,7 +3,8 @@
 # and write their docid, query, passage.
 
 from pathlib import Path
-import csv
+
+import pandas as pd
 
 # ========= configure =========
 PARTS_DIR    = Path("outputs/trec_dl_2019/retrieved/all_topics_in_parts")
@@ -18,66 +19,50 @@ QUERY_COL    = "query"
 PASSAGE_COL  = "passage"
 # ============================
 
-def dict_reader(path: Path):
-    fh = open(path, "r", newline="", encoding="utf-8-sig")
-    sample = fh.read(4096); fh.seek(0)
+NEEDED_COLS = [DOCID_COL, QUERY_COL, PASSAGE_COL]
+
+def read_part(path: Path, usecols) -> pd.DataFrame:
     try:
-        dialect = csv.Sniffer().sniff(sample)
-    except csv.Error:
-        dialect = csv.get_dialect("excel")
-    return fh, csv.DictReader(fh, dialect=dialect)
+        return pd.read_csv(path, usecols=usecols, dtype=str, encoding="utf-8-sig")
+    except ValueError as e:
+        # pandas raises ValueError when a usecols column is absent
+        raise KeyError(f"{path}: {e}") from None
 
-# --- gather doc -> (query, passage) from parts
-parts_info = {}  # docid -> (query, passage)
+# --- gather doc -> (query, passage) from parts: one C-level parse per file,
+# concatenated and deduped in a single pass instead of a per-row dict loop
 part_files = sorted(PARTS_DIR.glob(PARTS_GLOB))
 if not part_files:
     raise FileNotFoundError(f"No files matching {PARTS_GLOB} in {PARTS_DIR}")
 
-for fp in part_files:
-    fh, rdr = dict_reader(fp)
-    try:
-        cols = rdr.fieldnames or []
-        for need in (DOCID_COL, QUERY_COL, PASSAGE_COL):
-            if need not in cols:
-                raise KeyError(f"{fp}: missing column '{need}'. Columns: {cols}")
-        for row in rdr:
-            did = (row.get(DOCID_COL) or "").strip()
-            if not did or did in parts_info:
-                continue
-            q = (row.get(QUERY_COL) or "").strip()
-            p = (row.get(PASSAGE_COL) or "").strip()
-            parts_info[did] = (q, p)
-    finally:
-        fh.close()
+parts_df = pd.concat(
+    [read_part(fp, NEEDED_COLS) for fp in part_files], ignore_index=True
+)
+for col in NEEDED_COLS:
+    parts_df[col] = parts_df[col].fillna("").str.strip()
+parts_df = parts_df[parts_df[DOCID_COL] != ""]
+parts_df = parts_df.drop_duplicates(DOCID_COL, keep="first")
 
 # --- read all_docs docids
 if not ALL_DOCS_FILE.exists():
     raise FileNotFoundError(f"All-docs file not found: {ALL_DOCS_FILE}")
 
-all_docs_ids = set()
-fh, rdr = dict_reader(ALL_DOCS_FILE)
-try:
-    if DOCID_COL not in (rdr.fieldnames or []):
-        raise KeyError(f"{ALL_DOCS_FILE}: missing '{DOCID_COL}'. Columns: {rdr.fieldnames}")
-    for row in rdr:
-        did = (row.get(DOCID_COL) or "").strip()
-        if did:
-            all_docs_ids.add(did)
-finally:
-    fh.close()
+all_docs_ids = set(
+    read_part(ALL_DOCS_FILE, [DOCID_COL])[DOCID_COL].fillna("").str.strip()
+)
+all_docs_ids.discard("")
 
-# --- compute missing and write details
-missing_ids = sorted(set(parts_info.keys()) - all_docs_ids, key=lambda x: (len(x), x))
-OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+# --- compute missing and write details, sorted by (len, docid) as before
+missing = parts_df[~parts_df[DOCID_COL].isin(all_docs_ids)]
+missing = (
+    missing.assign(_k=missing[DOCID_COL].str.len())
+    .sort_values(["_k", DOCID_COL])
+    .drop(columns="_k")
+)
 
-with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as out:
-    w = csv.writer(out)
-    w.writerow([DOCID_COL, QUERY_COL, PASSAGE_COL])  # header
-    for did in missing_ids:
-        q, p = parts_info[did]
-        w.writerow([did, q, p])
+OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+missing.to_csv(OUTPUT_FILE, index=False, columns=NEEDED_COLS)
 
-print(f"Parts files: {len(part_files)} | parts docids: {len(parts_info)}")
+print(f"Parts files: {len(part_files)} | parts docids: {len(parts_df)}")
 print(f"All-docs docids: {len(all_docs_ids)}")
-print(f"Missing: {len(missing_ids)}")
+print(f"Missing: {len(missing)}")
 print(f"Wrote: {OUTPUT_FILE}")
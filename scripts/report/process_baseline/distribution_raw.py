@@ -6,6 +6,8 @@ from pathlib import Path
 from collections import Counter
 import csv
 
+import pandas as pd
+
 # ==== Configure these ====
 INPUT_DIR    = Path("outputs/trec_dl_2019/retrieved/all_topics_in_parts")  # folder with many CSVs
 GLOB_PATTERN = "*.csv"                      # which files to include
@@ -24,46 +26,27 @@ counts = Counter()
 total_rows = 0
 files_read = 0
 
-def detect_reader(path: Path):
-    """Return a csv.DictReader with a sniffed dialect (fallback to comma)."""
-    f = open(path, "r", newline="", encoding="utf-8-sig")
-    sample = f.read(4096)
-    f.seek(0)
-    try:
-        dialect = csv.Sniffer().sniff(sample)
-    except csv.Error:
-        dialect = csv.get_dialect("excel")
-    return f, csv.DictReader(f, dialect=dialect)
-
 for fp in files:
-    with open(fp, "r", newline="", encoding="utf-8-sig") as f:
-        sample = f.read(4096)
-        f.seek(0)
-        try:
-            dialect = csv.Sniffer().sniff(sample)
-        except csv.Error:
-            dialect = csv.get_dialect("excel")
-        reader = csv.DictReader(f, dialect=dialect)
-
-        # choose label column per-file (relevance preferred; fallback to label)
-        fieldnames = [h.strip() for h in (reader.fieldnames or [])]
-        if LABEL_COLUMN in fieldnames:
-            lbl_col = LABEL_COLUMN
-        elif "label" in fieldnames:
-            lbl_col = "label"
-        else:
-            raise KeyError(
-                f"Neither '{LABEL_COLUMN}' nor 'label' found in {fp}. "
-                f"Available columns: {fieldnames}"
-            )
+    # choose label column per-file (relevance preferred; fallback to label)
+    header = list(pd.read_csv(fp, nrows=0, encoding="utf-8-sig").columns)
+    stripped = {h.strip(): h for h in header}
+    if LABEL_COLUMN in stripped:
+        lbl_col = stripped[LABEL_COLUMN]
+    elif "label" in stripped:
+        lbl_col = stripped["label"]
+    else:
+        raise KeyError(
+            f"Neither '{LABEL_COLUMN}' nor 'label' found in {fp}. "
+            f"Available columns: {sorted(stripped)}"
+        )
 
-        for row in reader:
-            if not row:
-                continue
-            label = str(row[lbl_col]).strip()
-            counts[label] += 1
-            total_rows += 1
-        files_read += 1
+    # One C-level value_counts per file, merged into the running Counter
+    labels = pd.read_csv(
+        fp, usecols=[lbl_col], dtype=str, encoding="utf-8-sig"
+    )[lbl_col].fillna("").str.strip()
+    counts.update(labels.value_counts().to_dict())
+    total_rows += len(labels)
+    files_read += 1
 
 # write summary
 with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as out:
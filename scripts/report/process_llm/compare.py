@@ -31,29 +31,34 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 # Extract model name from filenames like:
 # 20250917_011043_llm_labels_anthropic.claude-3-haiku-20240307-v1.csv
 MODEL_RE = re.compile(r"llm_labels_(.+)\.csv$", re.IGNORECASE)
+_model_search = MODEL_RE.search  # bound once; skips the attr lookup per call
 
 def extract_model_name(filename: str) -> str:
-    m = MODEL_RE.search(filename)
+    m = _model_search(filename)
     return m.group(1) if m else Path(filename).stem
 
 def load_doc_rels(csv_path: Path) -> dict[str, str]:
     """Load {docid: relevance} from a single CSV (accepts 'docid' or 'pid', 'relevance' or 'rel')."""
     with csv_path.open("r", encoding="utf-8", newline="") as fin:
-        reader = csv.DictReader(fin)
-        if not reader.fieldnames:
+        # Resolve column indices once, then iterate csv.reader: plain lists
+        # per row instead of a fresh dict per row (DictReader's main cost).
+        reader = csv.reader(fin)
+        header = next(reader, None)
+        if not header:
             return {}
-        fields = {c.lower(): c for c in reader.fieldnames}
-        doc_key = fields.get("docid") or fields.get("pid")
-        rel_key = fields.get("relevance") or fields.get("rel")
-        if not doc_key or not rel_key:
+        fields = {c.lower(): i for i, c in enumerate(header)}
+        doc_i = fields.get("docid", fields.get("pid"))
+        rel_i = fields.get("relevance", fields.get("rel"))
+        if doc_i is None or rel_i is None:
             return {}
 
         out = {}
         for row in reader:
-            did = (row.get(doc_key) or "").strip()
-            rel = (row.get(rel_key) or "").strip()
+            if len(row) <= max(doc_i, rel_i):
+                continue
+            did = row[doc_i].strip()
             if did:
-                out[did] = rel
+                out[did] = row[rel_i].strip()
         return out
 
 def load_models(folder: Path) -> dict[str, dict[str,str]]:
@@ -71,7 +76,11 @@ def main():
 
     models = load_models(MODEL_DIR)
     for model, rels in models.items():
-        common = sorted(set(rels) & set(nist), key=lambda x: (len(x), x))
+        # Sort (len, docid) tuples directly instead of calling a lambda key
+        # per comparison; tuple ordering gives the same shortlex result.
+        keyed = [(len(x), x) for x in set(rels) & set(nist)]
+        keyed.sort()
+        common = [x for _, x in keyed]
         if not common:
             print(f"No common docids for model: {model}")
             continue
@@ -3,9 +3,10 @@
 # Expects columns: query, docid, passage, relevance
 
 from pathlib import Path
-from collections import Counter
 import csv
 
+import pandas as pd
+
 # ==== Configure these ====
 INPUT_FILE   = Path("outputs/trec_dl_llm_label/processed/all_docs_label_cleaned.csv")
 OUTPUT_FILE  = Path("outputs/trec_dl_llm_label/processed/label_counts.csv")
@@ -18,27 +19,16 @@ if not INPUT_FILE.exists():
 
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-counts = Counter()
-total_rows = 0
-
-with open(INPUT_FILE, "r", newline="", encoding="utf-8-sig") as f:
-    sample = f.read(4096)
-    f.seek(0)
-    try:
-        dialect = csv.Sniffer().sniff(sample)
-    except csv.Error:
-        dialect = csv.get_dialect("excel")  # default comma
-    reader = csv.DictReader(f, dialect=dialect)
-
-    if LABEL_COLUMN not in (reader.fieldnames or []):
-        raise KeyError(f"Column '{LABEL_COLUMN}' not found. Available: {reader.fieldnames}")
-
-    for row in reader:
-        if not row:
-            continue
-        label = str(row[LABEL_COLUMN]).strip()
-        counts[label] += 1
-        total_rows += 1
+# Counting is one hashed value_counts pass in C instead of a per-row loop
+header = list(pd.read_csv(INPUT_FILE, nrows=0, encoding="utf-8-sig").columns)
+if LABEL_COLUMN not in header:
+    raise KeyError(f"Column '{LABEL_COLUMN}' not found. Available: {header}")
+
+labels = pd.read_csv(
+    INPUT_FILE, usecols=[LABEL_COLUMN], dtype=str, encoding="utf-8-sig"
+)[LABEL_COLUMN].fillna("").str.strip()
+counts = labels.value_counts().to_dict()
+total_rows = len(labels)
 
 header_needed = (not OUTPUT_FILE.exists()) or (OUTPUT_FILE.stat().st_size == 0)
 with open(OUTPUT_FILE, "a", newline="", encoding="utf-8") as out:
@@ -9,11 +9,13 @@ Inputs: compare CSVs in outputs/trec_dl_llm_label/processed/
 Accepted headers: (docid, nist_rel, llm_rel) or (docid, rel_reference, rel_model)
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import csv
+import os
 import re
 import numpy as np
-from sklearn.metrics import cohen_kappa_score        # pip install scikit-learn
+import pandas as pd
 import krippendorff as kd                            # pip install krippendorff
 
 BASE_DIR = Path("outputs/trec_dl_llm_label")
@@ -21,57 +23,84 @@ IN_DIR   = BASE_DIR / "processed/utility/20250920_223947"
 OUT_CSV  = IN_DIR / "doc_rel_summary.csv"
 MODEL_RE = re.compile(r"doc_rel_compare_(.+)\.csv$", re.IGNORECASE)
 
-def as_int(s):
-    try:
-        return int(str(s).strip())
-    except Exception:
-        return None
-
 def extract_model_name(path: Path) -> str:
     m = MODEL_RE.match(path.name)
     return m.group(1) if m else path.stem
 
-def _binarize(vals):
-    """0 -> 0; {1,2,3,...} -> 1"""
-    return [0 if (v is None or v <= 0) else 1 for v in vals]
+def confusion_matrix_of(ref, mod):
+    """L×L counts (rows = reference grade, cols = model grade)."""
+    ref = np.asarray(ref, dtype=np.int64)
+    mod = np.asarray(mod, dtype=np.int64)
+    n_labels = int(max(ref.max(), mod.max())) + 1
+    return np.bincount(ref * n_labels + mod, minlength=n_labels * n_labels) \
+             .reshape(n_labels, n_labels)
+
+def kappas_from_cm(cm):
+    """(kappa, kappa_linear, kappa_quadratic, kappa_binarized) from one matrix.
+
+    One O(n) pass builds the matrix; everything here is O(L^2) arithmetic,
+    so the four kappa variants no longer each rescan the label arrays.
+    """
+    cm = cm.astype(np.float64)
+    n = cm.sum()
+    if n == 0:
+        return (float("nan"),) * 4
+
+    idx = np.arange(cm.shape[0])
+    dist = np.abs(idx[:, None] - idx[None, :])
+    expected = np.outer(cm.sum(axis=1), cm.sum(axis=0)) / n
+
+    def weighted_kappa(w):
+        denom = (w * expected).sum()
+        return float("nan") if denom == 0 else 1.0 - (w * cm).sum() / denom
+
+    k      = weighted_kappa((dist > 0).astype(np.float64))
+    k_lin  = weighted_kappa(dist)
+    k_quad = weighted_kappa(dist ** 2)
+
+    # Binarized view (0 vs >=1) is just the 2x2 collapse of the same matrix.
+    b = np.array([[cm[0, 0],          cm[0, 1:].sum()],
+                  [cm[1:, 0].sum(),   cm[1:, 1:].sum()]])
+    be = np.outer(b.sum(axis=1), b.sum(axis=0)) / n
+    po = (b[0, 0] + b[1, 1]) / n
+    pe = (be[0, 0] + be[1, 1]) / n
+    k_bin = float("nan") if pe == 1 else (po - pe) / (1 - pe)
+
+    return k, k_lin, k_quad, k_bin
 
 def summarize_file(path: Path):
     """Return (model, eq, lt, gt, n, k, k_lin, k_quad, k_bin, a_ord, nist_vals, llm_vals)."""
     model = extract_model_name(path)
-    eq = lt = gt = n = 0
-    nist_vals, llm_vals = [], []
+    empty = (model, 0,0,0,0, *(float("nan"),)*4, float("nan"), [], [])
 
+    # Load just the two relevance columns in one vectorized pass; the
+    # eq/lt/gt tallies become three NumPy comparisons instead of a
+    # per-row Python loop with as_int try/excepts.
     with path.open("r", encoding="utf-8", newline="") as fin:
-        rdr = csv.DictReader(fin)
-        if not rdr.fieldnames:
-            return (model, 0,0,0,0, *(float("nan"),)*4, float("nan"), [], [])
-
-        f = {c.lower(): c for c in rdr.fieldnames}
-        nkey = f.get("nist_rel") or f.get("rel_reference")
-        lkey = f.get("llm_rel")  or f.get("rel_model")
-        if not nkey or not lkey:
-            return (model, 0,0,0,0, *(float("nan"),)*4, float("nan"), [], [])
-
-        for row in rdr:
-            nist = as_int(row.get(nkey, ""))
-            llm  = as_int(row.get(lkey,  ""))
-            if nist is None or llm is None:
-                continue
-            nist_vals.append(nist)
-            llm_vals.append(llm)
-            n += 1
-            if llm == nist: eq += 1
-            elif llm < nist: lt += 1
-            else: gt += 1
-
+        header = next(csv.reader(fin), None)
+    if not header:
+        return empty
+    f = {c.lower(): c for c in header}
+    nkey = f.get("nist_rel") or f.get("rel_reference")
+    lkey = f.get("llm_rel")  or f.get("rel_model")
+    if not nkey or not lkey:
+        return empty
+
+    df = pd.read_csv(path, usecols=[nkey, lkey]).apply(pd.to_numeric, errors="coerce").dropna()
+    n = len(df)
     if n == 0:
-        return (model, 0,0,0,0, *(float("nan"),)*4, float("nan"), [], [])
+        return empty
 
-    # Cohen's kappa on graded and binarized labels
-    k      = cohen_kappa_score(nist_vals, llm_vals)
-    k_lin  = cohen_kappa_score(nist_vals, llm_vals, weights="linear")
-    k_quad = cohen_kappa_score(nist_vals, llm_vals, weights="quadratic")
-    k_bin  = cohen_kappa_score(_binarize(nist_vals), _binarize(llm_vals))
+    nist = df[nkey].to_numpy(np.int64)
+    llm  = df[lkey].to_numpy(np.int64)
+    eq = int((llm == nist).sum())
+    lt = int((llm < nist).sum())
+    gt = int((llm > nist).sum())
+    nist_vals = nist.tolist()
+    llm_vals  = llm.tolist()
+
+    # Cohen's kappa (graded + binarized), all derived from one matrix
+    k, k_lin, k_quad, k_bin = kappas_from_cm(confusion_matrix_of(nist, llm))
 
     # Krippendorff's alpha (ordinal)
     a_ord = kd.alpha(reliability_data=np.array([nist_vals, llm_vals]),
@@ -89,8 +118,16 @@ def main():
     ge = gl = gm = gt = 0
     all_nist, all_llm = [], []
 
-    for f in files:
-        model, eq, lt, gt1, n, k, kl, kq, kbin, aord, nv, lv = summarize_file(f)
+    # Each file is summarized independently (read + kappa/alpha), so fan the
+    # work out across cores when there are enough files to pay for process
+    # startup; small batches stay on the serial path.
+    if len(files) > 4:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            summaries = list(ex.map(summarize_file, files))
+    else:
+        summaries = [summarize_file(f) for f in files]
+
+    for model, eq, lt, gt1, n, k, kl, kq, kbin, aord, nv, lv in summaries:
         if n == 0:
             continue
         rows.append([model, eq, lt, gt1, n, k, kl, kq, kbin, aord])
@@ -102,10 +139,8 @@ def main():
         return
 
     # Overall metrics on pooled items
-    overall_k    = cohen_kappa_score(all_nist, all_llm)
-    overall_kl   = cohen_kappa_score(all_nist, all_llm, weights="linear")
-    overall_kq   = cohen_kappa_score(all_nist, all_llm, weights="quadratic")
-    overall_kbin = cohen_kappa_score(_binarize(all_nist), _binarize(all_llm))
+    overall_k, overall_kl, overall_kq, overall_kbin = \
+        kappas_from_cm(confusion_matrix_of(all_nist, all_llm))
     overall_aord = kd.alpha(reliability_data=np.array([all_nist, all_llm]),
                             level_of_measurement="ordinal")
 
@@ -1,9 +1,15 @@
 import boto3
 import json
 import csv
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from botocore.config import Config
+
 # ----------------------------
 # Configurable Paths
 # ----------------------------
@@ -13,6 +19,7 @@ INPUT_CSV   = Path("outputs/trec_dl/combined_irrelevant_results_20.csv")
 OUTPUT_DIR  = Path("outputs/trec_dl_llm_label/irrelevant")  # CSV outputs per run/model
 LOG_DIR     = Path("outputs/trec_dl/logs")        # JSON logs
 TOKENS_CSV  = Path("outputs/trec_dl_llm_label/token_usage.csv")  # cumulative token usage log
+CACHE_DB    = Path("outputs/trec_dl_llm_label/bedrock_cache.sqlite")  # (model, prompt) -> response text
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -20,7 +27,19 @@ LOG_DIR.mkdir(parents=True, exist_ok=True)
 # ----------------------------
 # Bedrock Config
 # ----------------------------
-bedrock = boto3.client("bedrock-runtime", region_name="us-west-2")
+# Concurrent Converse calls per model. Raise this until the Bedrock
+# per-model TPS limit (not the thread count) becomes the bottleneck;
+# the connection pool is sized from it so workers never queue on sockets.
+MAX_WORKERS = 16
+
+bedrock = boto3.client(
+    "bedrock-runtime",
+    region_name="us-west-2",
+    config=Config(
+        max_pool_connections=MAX_WORKERS * 2,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+    ),
+)
 
 MODELS = [
     #"anthropic.claude-3-haiku-20240307-v1:0",
@@ -76,74 +95,112 @@ with INPUT_CSV.open("r", encoding="utf-8") as f:
     reader = csv.DictReader(f)
     data_rows = [row for row in reader]
 
+# Extract the fields and build each prompt once up front; the prompt only
+# depends on (query, passage), so every model run reuses the same strings
+# instead of re-stripping and re-formatting per model.
+parsed_rows = [
+    (
+        row["query"],
+        row["docid"],
+        passage_text,
+        prompt_template.format(query=row["query"], passage=passage_text),
+    )
+    for row in data_rows
+    for passage_text in (row["passage"].strip(),)
+]
+
+# Response cache: re-runs (prompt tweaks, parser fixes) skip Bedrock for
+# every (model, prompt) pair already answered. sqlite handles concurrent
+# readers fine; the lock serializes access from the worker threads.
+_cache = sqlite3.connect(CACHE_DB, check_same_thread=False)
+_cache.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT)")
+_cache.commit()
+_cache_lock = threading.Lock()
+
+def converse_cached(model_id, prompt):
+    """Return (response_text, resp); resp is None when served from the cache."""
+    key = hashlib.sha1(f"{model_id}|{prompt}".encode()).hexdigest()
+    with _cache_lock:
+        hit = _cache.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+    if hit is not None:
+        return hit[0], None
+
+    messages = [{"role": "user", "content": [{"text": prompt}]}]
+    kwargs = {
+        "modelId": model_id,
+        "messages": messages,
+        "inferenceConfig": INFERENCE_CONFIG,
+    }
+
+    # Call Bedrock API
+    resp = bedrock.converse(**kwargs)
+
+    # Extract response text
+    try:
+        if model_id.startswith("openai."):
+            text = resp["output"]["message"]["content"][1]["text"]
+        else:
+            text = resp["output"]["message"]["content"][0]["text"]
+    except (KeyError, IndexError, TypeError):
+        text = ""
+
+    with _cache_lock:
+        _cache.execute("INSERT OR REPLACE INTO responses VALUES (?, ?)", (key, text))
+        _cache.commit()
+    return text, resp
+
+def score_row(model_id, parsed):
+    """Run one Converse call for a row; returns everything the main loop records."""
+    query, docid, passage_text, prompt = parsed
+
+    text, resp = converse_cached(model_id, prompt)
+
+    # Parse for JSON score
+    try:
+        scores = json.loads(text)
+        llm_score = scores.get("O", "")
+    except Exception:
+        llm_score = ""
+
+    return query, docid, passage_text, llm_score, prompt, text, resp
+
 for model_id in MODELS:
     print(f"\n--- Running inference for model: {model_id} ---")
 
-    results = []
     logs = []
 
     total_input_tokens = 0
     total_output_tokens = 0
     run_id = timestamp_id()
 
-    for row in data_rows:
-        query = row["query"]
-        docid = row["docid"]
-        passage_text = row["passage"].strip()
-
-        # Prepare prompt
-        prompt = prompt_template.format(query=query, passage=passage_text)
-
-        messages = [{"role": "user", "content": [{"text": prompt}]}]
-        kwargs = {
-            "modelId": model_id,
-            "messages": messages,
-            "inferenceConfig": INFERENCE_CONFIG,
-        }
-
-        # Call Bedrock API
-        resp = bedrock.converse(**kwargs)
-
-        # Extract response text
-        try:
-            if model_id.startswith("openai."):
-                text = resp["output"]["message"]["content"][1]["text"]
-            else:
-                text = resp["output"]["message"]["content"][0]["text"]
-        except (KeyError, IndexError, TypeError):
-            text = ""
-
-        # Parse for JSON score
-        try:
-            scores = json.loads(text)
-            llm_score = scores.get("O", "")
-        except Exception:
-            llm_score = ""
-
-        results.append([query, docid, passage_text, llm_score])
-
-        logs.append({
-            "query": query,
-            "docid": docid,
-            "prompt": prompt,
-            "response_text": text,
-            "full_response": resp
-        })
-
-        usage = resp.get("usage", {})
-        total_input_tokens  += int(usage.get("inputTokens", 0) or 0)
-        total_output_tokens += int(usage.get("outputTokens", 0) or 0)
-
-    # ----------------------------
-    # Write combined CSV per model
-    # ----------------------------
-    safe_model = model_id.replace(":", "_").replace("/", "_").replace("\\", "_")
-    out_csv = OUTPUT_DIR / f"{run_id}_llm_labels_{safe_model}_top2.csv"
-    with out_csv.open("w", encoding="utf-8", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["query", "docid", "passage", "relevance"])
-        for r in results:
-            writer.writerow(r)
+    # The calls are pure network I/O, so overlap them; executor.map keeps
+    # the results in input order.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        outcomes = ex.map(lambda parsed: score_row(model_id, parsed), parsed_rows)
+
+        # Stream label rows straight into the per-model CSV as workers
+        # finish instead of accumulating a results list first.
+        safe_model = model_id.replace(":", "_").replace("/", "_").replace("\\", "_")
+        out_csv = OUTPUT_DIR / f"{run_id}_llm_labels_{safe_model}_top2.csv"
+        with out_csv.open("w", encoding="utf-8", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["query", "docid", "passage", "relevance"])
+
+            for query, docid, passage_text, llm_score, prompt, text, resp in outcomes:
+                writer.writerow([query, docid, passage_text, llm_score])
+
+                logs.append({
+                    "query": query,
+                    "docid": docid,
+                    "prompt": prompt,
+                    "response_text": text,
+                    "full_response": resp
+                })
+
+                # Cache hits carry no response object, hence no fresh token usage.
+                usage = resp.get("usage", {}) if resp is not None else {}
+                total_input_tokens  += int(usage.get("inputTokens", 0) or 0)
+                total_output_tokens += int(usage.get("outputTokens", 0) or 0)
 
     # Write logs
     log_file = LOG_DIR / f"{run_id}_llm_responses_{safe_model}_top2.json"
@@ -1,4 +1,7 @@
+import hashlib
 import os
+import pickle
+from collections import defaultdict
 from pathlib import Path
 
 # --- Put all caches under D: (fewer lock/permission issues than %LOCALAPPDATA%)
@@ -27,9 +30,11 @@ searcher = LuceneSearcher.from_prebuilt_index('msmarco-v1-passage')
 searcher.set_bm25(k1=0.82, b=0.68)
 
 # Build qrels dict {qid: {docid: relevance}}
-qrels = {}
+# defaultdict avoids the per-row setdefault (empty-dict allocation + double
+# hash) that dominates this loop on larger qrels files.
+qrels = defaultdict(dict)
 for q in ds.qrels_iter():
-    qrels.setdefault(str(q.query_id), {})[q.doc_id] = int(q.relevance)
+    qrels[str(q.query_id)][q.doc_id] = int(q.relevance)
 
 # Grab a query (TREC-DL 2019 has ~43)
 queries = list(ds.queries_iter())
@@ -38,39 +43,42 @@ qid = str(query.query_id)
 topic = query.text
 print(f"Query {qid}: {topic}\n")
 
-# Retrieve
+# Retrieve (cached on disk so re-runs skip the BM25 pass entirely)
 k = 10
-hits = searcher.search(topic, k=k)
+cache_dir = Path("cache"); cache_dir.mkdir(exist_ok=True)
+cache_key = hashlib.sha1(f"msmarco-v1-passage|k1=0.82|b=0.68|k={k}|qid={qid}".encode()).hexdigest()
+cache_file = cache_dir / f"run_{cache_key}.pkl"
 
-# Collect
-results = []
-for i, h in enumerate(hits, 1):
-    doc = searcher.doc(h.docid)
-    doc_text = doc.raw() if doc is not None else ""
-    results.append({
-        "query": topic,
-        "passage": doc_text,
-        "docid": h.docid,
-        "score": h.score,
-        "relevance": qrels.get(qid, {}).get(h.docid, None)
-    })
+if cache_file.exists():
+    with cache_file.open("rb") as f:
+        hits = pickle.load(f)
+    print(f"Loaded {len(hits)} cached hits from {cache_file}")
+else:
+    hits = [(h.docid, h.score) for h in searcher.search(topic, k=k)]
+    with cache_file.open("wb") as f:
+        pickle.dump(hits, f)
 
-# Write outputs
+# Write outputs in one pass over the hits; both files consume the same
+# per-hit fields, so there is no need for an intermediate list of dicts
+# (and each passage body is fetched exactly once).
 out_dir = Path("outputs"); out_dir.mkdir(exist_ok=True)
 
 labels_path = out_dir / f"labels_trecdl2019_q{qid}.tsv"
-with labels_path.open("w", encoding="utf-8", newline="") as f:
-    f.write(f"# Dataset: TREC-DL 2019 (passage)\n# Query ID: {qid}\n# Topic: {topic}\n")
-    f.write("docid\trelevance\tscore\n")
-    for r in results:
-        f.write(f"{r['docid']}\t{r['relevance']}\t{r['score']:.4f}\n")
-
 docs_path = out_dir / f"topic_and_docs_trecdl2019_q{qid}.txt"
-with docs_path.open("w", encoding="utf-8") as f:
-    f.write(f"Dataset: TREC-DL 2019 (passage)\nQuery ID: {qid}\nTopic: {topic}\n\n")
-    for i, r in enumerate(results, 1):
-        f.write(f"Doc {i}: {r['docid']} (rel={r['relevance']}, score={r['score']:.3f})\n")
-        f.write("Passage:\n" + (r["passage"] or "") + "\n" + "-"*80 + "\n\n")
+qrels_for_qid = qrels.get(qid, {})
+
+with labels_path.open("w", encoding="utf-8", newline="") as labf, \
+     docs_path.open("w", encoding="utf-8") as docf:
+    labf.write(f"# Dataset: TREC-DL 2019 (passage)\n# Query ID: {qid}\n# Topic: {topic}\n")
+    labf.write("docid\trelevance\tscore\n")
+    docf.write(f"Dataset: TREC-DL 2019 (passage)\nQuery ID: {qid}\nTopic: {topic}\n\n")
+    for i, (docid, score) in enumerate(hits, 1):
+        relevance = qrels_for_qid.get(docid)
+        doc = searcher.doc(docid)
+        passage = (doc.raw() or "") if doc is not None else ""
+        labf.write(f"{docid}\t{relevance}\t{score:.4f}\n")
+        docf.write(f"Doc {i}: {docid} (rel={relevance}, score={score:.3f})\n")
+        docf.write("Passage:\n" + passage + "\n" + "-"*80 + "\n\n")
 
 print(f"Wrote: {labels_path}")
 print(f"Wrote: {docs_path}")
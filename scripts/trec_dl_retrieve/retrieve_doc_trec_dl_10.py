@@ -1,10 +1,20 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
 
 from pyserini.search.lucene import LuceneSearcher
 from pyserini.search import get_topics, get_qrels
 
+from trec_dl_common import (
+    build_dual_qrels,
+    index_name_for,
+    qid_sort_key,
+    qrels_for,
+    retrieve_until_min_judged,
+    topic_key_for,
+    topic_text,
+)
+
 # ----------------------------
 # Config
 # ----------------------------
@@ -23,78 +33,6 @@ OUT_DIR = Path("outputs/trec_dl")  # make sure this exists or can be created
 LABELS_NAME_FMT = "labels_trecdl_{level}_{year}_q{qid}.tsv"
 DOCS_NAME_FMT   = "topic_and_docs_trecdl_{level}_{year}_q{qid}.txt"
 
-# ----------------------------
-# Helpers
-# ----------------------------
-def topic_key_for(year: str, level: str) -> str:
-    return {
-        '2019': {'passage': 'dl19-passage', 'document': 'dl19-doc'},
-        '2020': {'passage': 'dl20-passage', 'document': 'dl20-doc'},
-    }[year][level]
-
-def index_name_for(level: str) -> str:
-    return 'msmarco-v1-passage' if level == 'passage' else 'msmarco-v1-doc'
-
-def qid_sort_key(x: Any):
-    sx = str(x)
-    return int(sx) if sx.isdigit() else sx
-
-def topic_text(rec: Any) -> str:
-    if isinstance(rec, dict):
-        return rec.get('title') or rec.get('text') or rec.get('query') or str(rec)
-    for attr in ('title', 'text', 'query'):
-        if hasattr(rec, attr):
-            v = getattr(rec, attr)
-            if v:
-                return v
-    return str(rec)
-
-def qrels_for(qrels_by_qid: Dict[Any, Dict[str, Any]], qid_any: Any) -> Dict[str, Any]:
-    if qid_any in qrels_by_qid:
-        return qrels_by_qid[qid_any]
-    s = str(qid_any).strip()
-    if s in qrels_by_qid:
-        return qrels_by_qid[s]
-    try:
-        i = int(s)
-        if i in qrels_by_qid:
-            return qrels_by_qid[i]
-    except ValueError:
-        pass
-    return {}
-
-def alt_docid_forms(docid: str, level: str) -> List[str]:
-    s = str(docid).strip()
-    if level == 'passage':
-        return [s, s.replace('msmarco_passage_', '', 1)] if s.startswith('msmarco_passage_') else [s, f'msmarco_passage_{s}']
-    return [s, s.replace('msmarco_doc_', '', 1)] if s.startswith('msmarco_doc_') else [s, f'msmarco_doc_{s}']
-
-def as_int_grade(g: Any) -> int:
-    try:
-        return int(g)
-    except Exception:
-        return 1 if str(g).strip().isdigit() and int(str(g).strip()) > 0 else 0
-
-def build_dual_qrels(raw_qrels: Dict[str, Any], level: str) -> Dict[str, int]:
-    dual: Dict[str, int] = {}
-    for did, g in raw_qrels.items():
-        grade = as_int_grade(g)
-        for form in alt_docid_forms(did, level):
-            dual[form] = max(grade, dual.get(form, -1))
-    return dual
-
-def retrieve_until_min_judged(searcher: LuceneSearcher, query_text: str,
-                              judged_lookup: Dict[str, int],
-                              k_start: int, min_judged: int, k_cap: int):
-    k = k_start
-    while True:
-        hits = searcher.search(query_text, k=k)
-        judged = sum(1 for h in hits if h.docid in judged_lookup)
-        if judged >= min_judged or k >= k_cap:
-            print(f"Final k={k}: judged_in_topk={judged}, unjudged_in_topk={len(hits)-judged}")
-            return hits
-        k = min(k * 2, k_cap)
-
 # ----------------------------
 # Main
 # ----------------------------
@@ -134,7 +72,8 @@ if __name__ == "__main__":
             judged_lookup=qrels_dual,
             k_start=K_START,
             min_judged=MIN_JUDGED,
-            k_cap=K_CAP
+            k_cap=K_CAP,
+            cache_sig=f"{index_name}|k1=0.82|b=0.68",  # reruns skip BM25 scoring
         )
 
         labels_path = OUT_DIR / LABELS_NAME_FMT.format(level=LEVEL, year=TRECDL_YEAR, qid=qid_str)
@@ -145,12 +84,22 @@ if __name__ == "__main__":
                 rel = qrels_dual.get(h.docid)
                 f.write(f"{h.docid}\t{rel}\t{h.score:.4f}\n")
 
+        # Stored-field lookups are native Lucene work (the GIL is released at
+        # the JVM boundary), so fetch all raw bodies across threads up front;
+        # the write loop below then does no per-hit JNI calls.
+        def fetch_raw(docid):
+            doc = searcher.doc(docid)
+            return docid, (doc.raw() or "") if doc is not None else ""
+
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            raw_by_id = dict(ex.map(fetch_raw, [h.docid for h in hits]))
+
         docs_path = OUT_DIR / DOCS_NAME_FMT.format(level=LEVEL, year=TRECDL_YEAR, qid=qid_str)
         with docs_path.open("w", encoding="utf-8") as f:
             f.write(f"Topics: {tkey}\nQuery ID: {qid_str}\nQuery: {query_text}\n\n")
             for rank, h in enumerate(hits, 1):
                 rel = qrels_dual.get(h.docid)
-                body = (searcher.doc(h.docid).raw() or "") if searcher.doc(h.docid) else ""
+                body = raw_by_id[h.docid]
                 f.write(f"Doc {rank}: {h.docid} (rel={rel}, score={h.score:.3f})\n")
                 f.write(("Passage:\n" if LEVEL == "passage" else "Document:\n") + body + "\n" + "-"*80 + "\n\n")
 
@@ -1,12 +1,23 @@
 import os
 import csv
-import json
 from pathlib import Path
-from typing import Any, Dict, List, Iterable
+from typing import Any, Iterable
 
 from pyserini.search.lucene import LuceneSearcher
 from pyserini.search import get_topics, get_qrels
 
+from trec_dl_common import (
+    build_dual_qrels,
+    extract_text_from_doc,
+    index_name_for,
+    pick_qids_to_run,
+    qid_sort_key,
+    qrels_for,
+    retrieve_until_min_judged,
+    topic_key_for,
+    topic_text,
+)
+
 # ----------------------------
 # Config
 # ----------------------------
@@ -31,141 +42,6 @@ K_CAP       = 10000  # maximum retrieval depth
 OUT_DIR = Path("outputs/trec_dl")
 COMBINED_CSV = OUT_DIR / f"trecdl_{LEVEL}_{TRECDL_YEAR}_combined.csv"
 
-# ----------------------------
-# Helpers
-# ----------------------------
-def topic_key_for(year: str, level: str) -> str:
-    return {
-        '2019': {'passage': 'dl19-passage', 'document': 'dl19-doc'},
-        '2020': {'passage': 'dl20-passage', 'document': 'dl20-doc'},
-    }[year][level]
-
-def index_name_for(level: str) -> str:
-    return 'msmarco-v1-passage' if level == 'passage' else 'msmarco-v1-doc'
-
-def qid_sort_key(x: Any):
-    sx = str(x)
-    return int(sx) if sx.isdigit() else sx
-
-def topic_text(rec: Any) -> str:
-    if isinstance(rec, dict):
-        return rec.get('title') or rec.get('text') or rec.get('query') or str(rec)
-    for attr in ('title', 'text', 'query'):
-        if hasattr(rec, attr):
-            v = getattr(rec, attr)
-            if v:
-                return v
-    return str(rec)
-
-def qrels_for(qrels_by_qid: Dict[Any, Dict[str, Any]], qid_any: Any) -> Dict[str, Any]:
-    """Return qrels for qid whether keys are ints or strs; strips whitespace."""
-    if qid_any in qrels_by_qid:
-        return qrels_by_qid[qid_any]
-    s = str(qid_any).strip()
-    if s in qrels_by_qid:
-        return qrels_by_qid[s]
-    try:
-        i = int(s)
-        if i in qrels_by_qid:
-            return qrels_by_qid[i]
-    except ValueError:
-        pass
-    return {}
-
-def alt_docid_forms(docid: str, level: str) -> List[str]:
-    """Return both prefixed and bare MS MARCO forms for robust matching."""
-    s = str(docid).strip()
-    if level == 'passage':
-        if s.startswith('msmarco_passage_'):
-            return [s, s.replace('msmarco_passage_', '', 1)]
-        return [s, f'msmarco_passage_{s}']
-    else:  # document
-        if s.startswith('msmarco_doc_'):
-            return [s, s.replace('msmarco_doc_', '', 1)]
-        return [s, f'msmarco_doc_{s}']
-
-def as_int_grade(g: Any) -> int:
-    """Normalize qrels grade to int (handles '0','1','2','3' as strings)."""
-    try:
-        return int(g)
-    except Exception:
-        return 1 if str(g).strip().isdigit() and int(str(g).strip()) > 0 else 0
-
-def build_dual_qrels(raw_qrels: Dict[str, Any], level: str) -> Dict[str, int]:
-    """Map both prefixed and bare docids to the same (int) grade."""
-    dual: Dict[str, int] = {}
-    for did, g in raw_qrels.items():
-        grade = as_int_grade(g)
-        for form in alt_docid_forms(did, level):
-            dual[form] = max(grade, dual.get(form, -1))
-    return dual
-
-def retrieve_until_min_judged(searcher: LuceneSearcher, query_text: str,
-                              judged_lookup: Dict[str, int],
-                              k_start: int, min_judged: int, k_cap: int,
-                              desired_k: int | None = None):
-    k = k_start
-    while True:
-        k_effective = max(k, desired_k or 0)
-        hits = searcher.search(query_text, k=k_effective)
-        judged = sum(1 for h in hits if h.docid in judged_lookup)
-        # stop when judged condition met AND we have at least desired_k (if specified)
-        if (judged >= min_judged or k >= k_cap) and (desired_k is None or len(hits) >= desired_k):
-            print(f"Final k={k_effective}: judged_in_topk={judged}, unjudged_in_topk={len(hits)-judged}")
-            print("Sample hit docids   :", [h.docid for h in hits[:5]])
-            print("Sample qrels docids :", list(judged_lookup.keys())[:5])
-            return hits
-        k = min(max(k * 2, desired_k or k), k_cap)
-
-def pick_qids_to_run(all_topics: Dict[Any, Any],
-                     qrels_by_qid: Dict[Any, Dict[str, Any]],
-                     force_qids: Iterable[Any] | None,
-                     n_queries: int) -> List[Any]:
-    """Choose at least n_queries judged topics (or all if fewer)."""
-    judged = [qid for qid in all_topics.keys() if len(qrels_for(qrels_by_qid, qid)) > 0]
-    judged_sorted = sorted(judged, key=qid_sort_key)
-
-    if force_qids:
-        forced = []
-        for q in force_qids:
-            if q in all_topics and len(qrels_for(qrels_by_qid, q)) > 0:
-                forced.append(q)
-        if not forced:
-            raise RuntimeError("None of the FORCE_QIDS have qrels.")
-        return forced
-
-    if not judged_sorted:
-        raise RuntimeError("No judged topics found for this topics key.")
-    if len(judged_sorted) < n_queries:
-        print(f"Warning: only {len(judged_sorted)} judged topics available; running all.")
-    return judged_sorted[:max(1, min(len(judged_sorted), n_queries))]
-
-def extract_text_from_doc(doc) -> str:
-    """Best-effort extraction of passage/document text."""
-    if not doc:
-        return ""
-    raw = doc.raw() or ""
-    # Try JSON payload (common in msmarco prebuilt indexes)
-    try:
-        obj = json.loads(raw)
-        if isinstance(obj, dict):
-            if "contents" in obj and isinstance(obj["contents"], str):
-                return obj["contents"]
-            # Some variants store under "raw" or similar keys
-            for k in ("raw", "text", "body"):
-                if k in obj and isinstance(obj[k], str):
-                    return obj[k]
-    except Exception:
-        pass
-    # Fallback: use .contents() if available, else raw
-    try:
-        c = doc.contents()
-        if isinstance(c, str) and c.strip():
-            return c
-    except Exception:
-        pass
-    return raw
-
 # ----------------------------
 # Main
 # ----------------------------
@@ -1,12 +1,23 @@
 import os
 import csv
-import json
 from pathlib import Path
-from typing import Any, Dict, List, Iterable, Tuple, Optional
+from typing import Any, Iterable
 
 from pyserini.search.lucene import LuceneSearcher
 from pyserini.search import get_topics, get_qrels
 
+from trec_dl_common import (
+    as_int_grade,
+    extract_text_from_doc,
+    fetch_doc_by_any_form,
+    index_name_for,
+    pick_qids_to_run,
+    qid_sort_key,
+    qrels_for,
+    topic_key_for,
+    topic_text,
+)
+
 # ----------------------------
 # Config
 # ----------------------------
@@ -25,121 +36,6 @@ N_QUERIES   = 25
 OUT_DIR = Path("outputs/trec_dl")
 COMBINED_CSV = OUT_DIR / f"trecdl_{LEVEL}_{TRECDL_YEAR}_judged_only.csv"
 
-# ----------------------------
-# Helpers
-# ----------------------------
-def topic_key_for(year: str, level: str) -> str:
-    return {
-        '2019': {'passage': 'dl19-passage', 'document': 'dl19-doc'},
-        '2020': {'passage': 'dl20-passage', 'document': 'dl20-doc'},
-    }[year][level]
-
-def index_name_for(level: str) -> str:
-    return 'msmarco-v1-passage' if level == 'passage' else 'msmarco-v1-doc'
-
-def qid_sort_key(x: Any):
-    sx = str(x)
-    return int(sx) if sx.isdigit() else sx
-
-def topic_text(rec: Any) -> str:
-    if isinstance(rec, dict):
-        return rec.get('title') or rec.get('text') or rec.get('query') or str(rec)
-    for attr in ('title', 'text', 'query'):
-        if hasattr(rec, attr):
-            v = getattr(rec, attr)
-            if v:
-                return v
-    return str(rec)
-
-def qrels_for(qrels_by_qid: Dict[Any, Dict[str, Any]], qid_any: Any) -> Dict[str, Any]:
-    """Return qrels for qid whether keys are ints or strs; strips whitespace."""
-    if qid_any in qrels_by_qid:
-        return qrels_by_qid[qid_any]
-    s = str(qid_any).strip()
-    if s in qrels_by_qid:
-        return qrels_by_qid[s]
-    try:
-        i = int(s)
-        if i in qrels_by_qid:
-            return qrels_by_qid[i]
-    except ValueError:
-        pass
-    return {}
-
-def alt_docid_forms(docid: str, level: str) -> List[str]:
-    """Return both prefixed and bare MS MARCO forms for robust matching."""
-    s = str(docid).strip()
-    if level == 'passage':
-        if s.startswith('msmarco_passage_'):
-            return [s, s.replace('msmarco_passage_', '', 1)]
-        return [s, f'msmarco_passage_{s}']
-    else:  # document
-        if s.startswith('msmarco_doc_'):
-            return [s, s.replace('msmarco_doc_', '', 1)]
-        return [s, f'msmarco_doc_{s}']
-
-def as_int_grade(g: Any) -> int:
-    """Normalize qrels grade to int (handles '0','1','2','3' as strings)."""
-    try:
-        return int(g)
-    except Exception:
-        return 1 if str(g).strip().isdigit() and int(str(g).strip()) > 0 else 0
-
-def extract_text_from_doc(doc) -> str:
-    """Best-effort extraction of passage/document text."""
-    if not doc:
-        return ""
-    raw = doc.raw() or ""
-    # Try JSON payload (common in msmarco prebuilt indexes)
-    try:
-        obj = json.loads(raw)
-        if isinstance(obj, dict):
-            if "contents" in obj and isinstance(obj["contents"], str):
-                return obj["contents"]
-            for k in ("raw", "text", "body"):
-                if k in obj and isinstance(obj[k], str):
-                    return obj[k]
-    except Exception:
-        pass
-    try:
-        c = doc.contents()
-        if isinstance(c, str) and c.strip():
-            return c
-    except Exception:
-        pass
-    return raw
-
-def fetch_doc_by_any_form(searcher: LuceneSearcher, docid: str, level: str) -> Tuple[Optional[str], Optional[Any]]:
-    """Try both bare and prefixed forms; return (resolved_id, doc) or (None, None)."""
-    for form in alt_docid_forms(docid, level):
-        d = searcher.doc(form)
-        if d is not None:
-            return form, d
-    return None, None
-
-def pick_qids_to_run(all_topics: Dict[Any, Any],
-                     qrels_by_qid: Dict[Any, Dict[str, Any]],
-                     force_qids: Iterable[Any] | None,
-                     n_queries: int) -> List[Any]:
-    """Choose at least n_queries judged topics (or all if fewer)."""
-    judged = [qid for qid in all_topics.keys() if len(qrels_for(qrels_by_qid, qid)) > 0]
-    judged_sorted = sorted(judged, key=qid_sort_key)
-
-    if force_qids:
-        forced = []
-        for q in force_qids:
-            if q in all_topics and len(qrels_for(qrels_by_qid, q)) > 0:
-                forced.append(q)
-        if not forced:
-            raise RuntimeError("None of the FORCE_QIDS have qrels.")
-        return forced
-
-    if not judged_sorted:
-        raise RuntimeError("No judged topics found for this topics key.")
-    if len(judged_sorted) < n_queries:
-        print(f"Warning: only {len(judged_sorted)} judged topics available; running all.")
-    return judged_sorted[:max(1, min(len(judged_sorted), n_queries))]
-
 # ----------------------------
 # Main
 # ----------------------------